@@ -3,11 +3,16 @@ Main Streamlit application for the Emoji Story Builder.
 Provides UI for emoji display, note taking, and session management.
 """
 
+import hashlib
+import json
 import os
+import re
 import sys
+import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-import requests
+from typing import Iterable, List, Tuple
 
 # Ensure src directory is in Python path for absolute imports
 src_dir = str(Path(__file__).parent.parent)
@@ -25,6 +30,7 @@ except Exception as e:
 # Import dependencies with error logging
 try:
     import streamlit as st
+    import streamlit.components.v1 as components
 except ImportError as e:
     logger.error(f"Failed to import streamlit: {str(e)}")
     print("Error: 'streamlit' package not installed. Please run: pip install -r requirements.txt")
@@ -39,99 +45,180 @@ except ImportError as e:
     print(f"Error: Failed to import required modules: {str(e)}")
     sys.exit(1)
 
-# Ensure required directories exist
-os.makedirs('logs', exist_ok=True)
-os.makedirs('data', exist_ok=True)
-
 logger = get_logger()
 
+# Verbose stdout tracing of the main loop, enabled with ESB_DEBUG=1
+_DEBUG = os.getenv('ESB_DEBUG') == '1'
+
+def _dbg(msg: str) -> None:
+    """Print a diagnostic trace line when ESB_DEBUG is enabled."""
+    if _DEBUG:
+        print(msg)
+
+# readme.md lives in the project root, resolved independently of the working directory
+README_PATH = Path(__file__).parent.parent / 'readme.md'
+
+# Pending browser console entries kept between flushes; older ones are dropped
+BROWSER_LOG_LIMIT = 256
+
+# Upper bound on concurrently generated story variants
+MAX_STORY_VARIANTS = 4
+
+# Minimum interval between notes autosaves
+SAVE_DEBOUNCE_SECONDS = 2.0
+
+# Minimum interval between re-renders of a story while it streams in
+STREAM_RENDER_INTERVAL = 0.1
+
+# Cap on how much of the sessions file the History tab ships to the browser
+HISTORY_TAIL_BYTES = 64 * 1024
+
+# Bytes read from the end of logs/error.log for the Debug Console
+LOG_TAIL_BYTES = 4096
+
+# Emoji grid styling, sent together with the grid markup
+EMOJI_GRID_CSS = (
+    "<style>"
+    ".emoji-container{font-size:4rem;text-align:center;padding:10px;transition:transform .2s}"
+    ".emoji-container:hover{transform:scale(1.2)}"
+    "</style>"
+)
+
+# Matches a ```mermaid fenced block up to its closing fence
+_MERMAID_RE = re.compile(r"```mermaid(.*?)```", re.DOTALL)
+
 # Initialize services
 @st.cache_resource
 def init_services():
     """Initialize application services."""
     try:
+        # Ensure required directories exist; cache_resource runs this once per process
+        Path('logs').mkdir(exist_ok=True)
+        Path('data').mkdir(exist_ok=True)
         return EmojiManager(), DataStore(), OllamaClient()
     except Exception as e:
         logger.error(f"Failed to initialize services: {str(e)}")
         st.error("Failed to initialize application services. Please check the logs and ensure all dependencies are installed.")
         raise
 
+@st.cache_data(ttl=5, show_spinner=False)
+def _cached_sessions(_data_store: DataStore, path: str, mtime: float) -> List[dict]:
+    """All saved sessions, cached until the data file changes or the TTL expires."""
+    return _data_store.get_all_sessions()
+
+def read_tail(path: str, max_bytes: int) -> Tuple[str, bool]:
+    """
+    Read at most the last max_bytes of a file.
+
+    Returns:
+        Tuple of (text, truncated). When truncated, the partial first line is dropped.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        f.seek(max(0, size - max_bytes))
+        tail = f.read().decode('utf-8', 'ignore')
+
+    truncated = size > max_bytes
+    if truncated:
+        _, _, tail = tail.partition('\n')
+    return tail, truncated
+
+# Each save changes the mtime; keep only the latest couple of tails instead of one per version
+@st.cache_data(max_entries=2, show_spinner=False)
+def _load_tail(path: str, mtime: float, max_bytes: int) -> Tuple[str, bool]:
+    """Tail a file, cached across reruns until its mtime changes."""
+    return read_tail(path, max_bytes)
+
+@st.cache_data(ttl=2, max_entries=1, show_spinner=False)
+def _load_log_tail(path: str, max_bytes: int) -> Tuple[str, bool]:
+    """Tail the error log, re-read at most every two seconds."""
+    return read_tail(path, max_bytes)
+
 def init_session_state():
     """Initialize session state variables."""
-    try:
-        if 'current_emojis' not in st.session_state:
-            st.session_state.current_emojis = []
-        if 'notes' not in st.session_state:
-            st.session_state.notes = ""
-        if 'generated_story' not in st.session_state:
-            st.session_state.generated_story = ""
-        if 'browser_logs' not in st.session_state:
-            st.session_state.browser_logs = []
-        if 'last_log_index' not in st.session_state:
-            st.session_state.last_log_index = 0
-    except Exception as e:
-        logger.error(f"Failed to initialize session state: {str(e)}")
-        st.error("Failed to initialize session state. Please refresh the page.")
-        raise
+    # Fast path: after the first run this is a single lookup
+    if st.session_state.get('_inited'):
+        return
+    st.session_state.setdefault('current_emojis', [])
+    st.session_state.setdefault('notes', "")
+    st.session_state.setdefault('generated_story', "")
+    st.session_state.setdefault('story_variants', [])
+    st.session_state.setdefault('last_save_ts', 0.0)
+    st.session_state.setdefault('browser_logs', deque(maxlen=BROWSER_LOG_LIMIT))
+    st.session_state._inited = True
+
+def build_emoji_grid_html(emojis: List[str], cols_per_row: int = 5) -> str:
+    """Build one HTML grid for all emojis; 5 columns suit most screens."""
+    cells = "".join(f"<div class='emoji-container'>{emoji_char}</div>" for emoji_char in emojis)
+    return (
+        f"<div style='display:grid;grid-template-columns:repeat({cols_per_row},1fr);gap:10px'>"
+        f"{cells}</div>"
+    )
 
 def render_emoji_section(emoji_manager: EmojiManager):
-    """Render the emoji display section using responsive Streamlit columns."""
-    try:
-        if st.session_state.current_emojis:
-            # Create a responsive grid using st.columns
-            # We use 5 columns for a good distribution on most screens
-            num_emojis = len(st.session_state.current_emojis)
-            cols_per_row = 5
-            
-            # Use custom CSS for the emoji styling
-            st.markdown("""
-                <style>
-                .emoji-container {
-                    font-size: 4rem;
-                    text-align: center;
-                    padding: 10px;
-                    transition: transform 0.2s;
-                }
-                .emoji-container:hover {
-                    transform: scale(1.2);
-                }
-                </style>
-            """, unsafe_allow_html=True)
-
-            # Display emojis in a grid
-            for i in range(0, num_emojis, cols_per_row):
-                batch = st.session_state.current_emojis[i:i + cols_per_row]
-                cols = st.columns(cols_per_row)
-                for idx, emoji_char in enumerate(batch):
-                    with cols[idx]:
-                        st.markdown(
-                            f"<div class='emoji-container'>{emoji_char}</div>",
-                            unsafe_allow_html=True
-                        )
-        else:
-            st.info("Generate some emojis to get started!")
-            
-    except Exception as e:
-        logger.error(f"Failed to render emoji section: {str(e)}")
-        st.error("Failed to display emojis. Please try again.")
+    """Render the emoji display section as a single responsive HTML grid."""
+    if st.session_state.current_emojis:
+        # Rebuild the grid HTML only when the emojis change; otherwise reuse the cached blob
+        key = tuple(st.session_state.current_emojis)
+        cached = st.session_state.get('_emoji_html_cache')
+        if cached is None or cached[0] != key:
+            # Styles and grid go out as one element instead of a separate CSS block
+            cached = (key, EMOJI_GRID_CSS + build_emoji_grid_html(st.session_state.current_emojis))
+            st.session_state._emoji_html_cache = cached
+        st.markdown(cached[1], unsafe_allow_html=True)
+    else:
+        st.info("Generate some emojis to get started!")
+
+def save_current_session(data_store: DataStore, force: bool = False):
+    """
+    Save the current session to storage.
 
-def save_current_session(data_store: DataStore):
-    """Save the current session to storage."""
+    Autosaves are throttled to one per SAVE_DEBOUNCE_SECONDS; a skipped
+    autosave is marked pending and written later by flush_pending_save. Pass
+    force=True for explicit saves that must always be written.
+    """
     try:
         if st.session_state.current_emojis:
+            # Skip the write when nothing changed since the last successful save
+            content_hash = hashlib.blake2b(
+                repr((tuple(st.session_state.current_emojis), st.session_state.notes)).encode(),
+                digest_size=8
+            ).digest()
+            if st.session_state.get('_last_save_hash') == content_hash:
+                st.session_state._save_pending = False
+                return
+            now = time.monotonic()
+            if not force and now - st.session_state.last_save_ts < SAVE_DEBOUNCE_SECONDS:
+                st.session_state._save_pending = True
+                return
             data_store.save_session(
                 emojis=st.session_state.current_emojis,
                 notes=st.session_state.notes
             )
-            logger.info("Session saved successfully")
+            st.session_state._last_save_hash = content_hash
+            st.session_state.last_save_ts = now
+            st.session_state._save_pending = False
+            logger.debug("Session saved successfully")
     except Exception as e:
         logger.error(f"Failed to save session: {str(e)}")
         st.error("Failed to save session. Please try again.")
 
+def flush_pending_save(data_store: DataStore, force: bool = False):
+    """
+    Write an autosave that was skipped by the debounce.
+
+    Called on each rerun once the interval has passed, and with force=True
+    before the current emojis and notes are replaced.
+    """
+    if not st.session_state.get('_save_pending'):
+        return
+    if force or time.monotonic() - st.session_state.last_save_ts >= SAVE_DEBOUNCE_SECONDS:
+        save_current_session(data_store, force=True)
+
 def browser_log(tag, data):
     """Log data to the browser's developer console via session state collector."""
     if 'browser_logs' not in st.session_state:
-        st.session_state.browser_logs = []
+        st.session_state.browser_logs = deque(maxlen=BROWSER_LOG_LIMIT)
     
     st.session_state.browser_logs.append({
         "timestamp": datetime.now().isoformat(),
@@ -141,28 +228,23 @@ def browser_log(tag, data):
 
 def flush_browser_logs():
     """Flush pending browser logs in a single batch to reduce console noise."""
-    import json
-    import streamlit.components.v1 as components
-    
-    if 'browser_logs' not in st.session_state or 'last_log_index' not in st.session_state:
+    browser_logs = st.session_state.get('browser_logs')
+    if not browser_logs:
         return
         
-    pending_logs = st.session_state.browser_logs[st.session_state.last_log_index:]
-    if not pending_logs:
-        return
+    pending_logs = []
+    while browser_logs:
+        pending_logs.append(browser_logs.popleft())
         
-    log_js = "".join([f"console.log({json.dumps(log)});" for log in pending_logs])
+    payload = json.dumps(pending_logs, separators=(',', ':'))
     components.html(
-        f"<script>{log_js}</script>",
+        f"<script>var L={payload};for(var i=0;i<L.length;i++)console.log(L[i]);</script>",
         height=0,
         width=0
     )
-    st.session_state.last_log_index = len(st.session_state.browser_logs)
 
 def render_mermaid(code: str) -> None:
     """Render a mermaid diagram using a custom HTML component."""
-    import streamlit.components.v1 as components
-    
     # Strip whitespace to prevent rendering issues
     # Note: We do not escape HTML here because it breaks Mermaid syntax (e.g. --> becomes -&gt;)
     clean_code = code.strip()
@@ -181,168 +263,261 @@ def render_mermaid(code: str) -> None:
         scrolling=True
     )
 
-def markdown_with_mermaid(markdown_text: str) -> None:
-    """Render markdown text with support for Mermaid diagrams."""
-    parts = markdown_text.split("```mermaid")
-    
-    # Render the first part (regular markdown)
-    if parts[0].strip():
-        st.markdown(parts[0])
-    
-    # Iterate over the remaining parts
-    for part in parts[1:]:
-        # Split into the diagram code and the rest of the markdown
-        if "```" in part:
-            mermaid_code, rest = part.split("```", 1)
-            render_mermaid(mermaid_code)
-            if rest.strip():
-                st.markdown(rest)
+def split_mermaid_segments(markdown_text: str) -> List[Tuple[str, str]]:
+    """Split markdown text into ("md", text) and ("mermaid", code) segments in one pass."""
+    segments = []
+    last = 0
+
+    for match in _MERMAID_RE.finditer(markdown_text):
+        segments.append(("md", markdown_text[last:match.start()]))
+        segments.append(("mermaid", match.group(1)))
+        last = match.end()
+
+    # Trailing markdown, including any unterminated mermaid fence
+    segments.append(("md", markdown_text[last:]))
+    return segments
+
+@st.cache_resource(show_spinner=False)
+def _readme_segments(path: str, mtime: float) -> List[Tuple[str, str]]:
+    """
+    Pre-parse the readme into render segments once per file mtime.
+
+    The raw text is not cached separately, so only the segments stay resident
+    and inactive-tab reruns cost a single stat call.
+    """
+    return split_mermaid_segments(Path(path).read_text(encoding='utf-8'))
+
+def markdown_with_mermaid(segments: List[Tuple[str, str]]) -> None:
+    """Render pre-parsed markdown segments with support for Mermaid diagrams."""
+    for kind, payload in segments:
+        if kind == "mermaid":
+            render_mermaid(payload)
+        elif payload.strip():
+            st.markdown(payload)
+
+def _accumulate_streaming_response(chunks: Iterable[str], placeholder) -> str:
+    """
+    Render streamed text into a placeholder as it arrives and return the full story.
+
+    Chunks are collected in a list; the text is only joined and re-sent to the
+    browser every STREAM_RENDER_INTERVAL seconds and once at the end, so the
+    cost stays linear in the story length instead of one full copy per chunk.
+    """
+    parts = []
+    last_render = 0.0
+    for chunk in chunks:
+        parts.append(chunk)
+        now = time.monotonic()
+        if now - last_render >= STREAM_RENDER_INTERVAL:
+            placeholder.markdown("".join(parts))
+            last_render = now
+    story = "".join(parts)
+    placeholder.markdown(story)
+    return story.strip()
+
+@st.fragment
+def render_story_controls(ollama_client: OllamaClient, ollama_online: bool):
+    """Render story generation controls; slider changes rerun only this fragment."""
+    # Get available models
+    models = []
+    selected_model = None
+    if ollama_online:
+        # The client caches the model list itself and drops it when Ollama reports a 404
+        models = ollama_client.get_available_models()
+        if not models:
+            st.warning("No local models found. Use 'ollama pull <modelname>' to download one.")
         else:
-            # Fallback if text parsing fails
-            st.markdown("```mermaid" + part)
+            selected_model = st.selectbox(
+                "Select Ollama Model",
+                options=models,
+                index=0,
+                help="Choose the model to use for story generation."
+            )
+
+    if st.session_state.current_emojis:
+        st.markdown("**Generate a Story from these Emojis**")
+        word_count = st.slider(
+            "Approximate Story Length (words)",
+            min_value=50,
+            max_value=500,
+            value=150,
+            step=10,
+            help="Target number of words for the generated story."
+        )
+        temperature = st.slider(
+            "Creativity (Temperature)",
+            min_value=0.1,
+            max_value=1.5,
+            value=1.2,
+            step=0.05,
+            help="Higher values = more creative, lower = more focused."
+        )
+        num_variants = st.number_input(
+            "Variants",
+            min_value=1,
+            max_value=MAX_STORY_VARIANTS,
+            value=1,
+            help="Generate several alternative stories concurrently."
+        )
+        
+        generate_clicked = st.button("Generate Story from Emojis", disabled=not (ollama_online and selected_model))
+        # Single slot for the story: streamed markdown while generating, then the final text area
+        story_placeholder = st.empty()
+        if generate_clicked:
+            try:
+                # Log the request to browser console
+                browser_log("OLLAMA_REQUEST", {
+                    "model": selected_model,
+                    "emojis": st.session_state.current_emojis,
+                    "word_count": word_count,
+                    "temperature": temperature,
+                    "variants": num_variants
+                })
+                
+                stats = {}
+                if num_variants > 1:
+                    # Variants are requested concurrently over the pooled session
+                    with st.spinner(f"Generating {num_variants} stories using {selected_model}..."):
+                        variants = ollama_client.generate_stories(
+                            st.session_state.current_emojis,
+                            num_variants,
+                            model=selected_model,
+                            word_count=word_count,
+                            temperature=temperature
+                        )
+                    story = variants[0]
+                else:
+                    # Stream chunks into the placeholder so the story appears as it is generated
+                    with st.spinner(f"Generating story using {selected_model}..."):
+                        story = _accumulate_streaming_response(
+                            ollama_client.generate_story_stream(
+                                st.session_state.current_emojis,
+                                model=selected_model,
+                                word_count=word_count,
+                                temperature=temperature,
+                                stats=stats
+                            ),
+                            story_placeholder
+                        )
+                    variants = [story]
+                
+                # Log the response to browser console
+                browser_log("OLLAMA_RESPONSE", {
+                    "story_length": len(story),
+                    "story_preview": story[:100] + "...",
+                    "variants": len(variants),
+                    "stats": stats
+                })
+                
+                st.session_state.generated_story = story
+                st.session_state.story_variants = variants
+            except Exception as e:
+                logger.error(f"Failed to generate story: {str(e)}")
+                st.error("Failed to generate story. Please check Ollama server and try again.")
+            # Without a full rerun, main() will not flush these logs until the next interaction
+            flush_browser_logs()
+        
+        if len(st.session_state.story_variants) > 1:
+            with story_placeholder.container():
+                variant_tabs = st.tabs([f"Variant {i + 1}" for i in range(len(st.session_state.story_variants))])
+                for i, (tab, variant) in enumerate(zip(variant_tabs, st.session_state.story_variants)):
+                    with tab:
+                        st.text_area(f"Generated Story (Variant {i + 1})", value=variant, height=250)
+        elif st.session_state.generated_story:
+            story_placeholder.text_area(
+                "Generated Story",
+                value=st.session_state.generated_story,
+                height=250
+            )
+
+@st.fragment
+def render_session_history(data_store: DataStore):
+    """Render the optional session history list; toggling reruns only this fragment."""
+    if st.checkbox("Show Session History"):
+        try:
+            sessions = _cached_sessions(
+                data_store,
+                data_store.data_file,
+                os.path.getmtime(data_store.data_file)
+            )
+            for session in sessions:
+                with st.expander(f"Session from {session['timestamp']}"):
+                    st.write("Emojis: " + " ".join(session["emojis"]))
+                    st.write("Notes:", session["notes"])
+        except Exception as e:
+            logger.error(f"Failed to display session history: {str(e)}")
+            st.error("Failed to load session history.")
 
 def main():
     """Main application entry point."""
-    print("[Emoji Story Builder] Starting main application...")
+    _dbg("[Emoji Story Builder] Starting main application...")
     try:
         st.title("Emoji Story Builder")
-        print("[Emoji Story Builder] Rendering title...")
+        _dbg("[Emoji Story Builder] Rendering title...")
         
         # Initialize services and session state
         try:
-            print("[Emoji Story Builder] Initializing services...")
+            _dbg("[Emoji Story Builder] Initializing services...")
             emoji_manager, data_store, ollama_client = init_services()
-            print("[Emoji Story Builder] Services initialized.")
+            _dbg("[Emoji Story Builder] Services initialized.")
             init_session_state()
-            print("[Emoji Story Builder] Session state initialized.")
+            _dbg("[Emoji Story Builder] Session state initialized.")
+            flush_pending_save(data_store)
         except Exception as e:
-            print(f"[Emoji Story Builder] Initialization failed: {str(e)}")
+            _dbg(f"[Emoji Story Builder] Initialization failed: {str(e)}")
             logger.error(f"Initialization failed: {str(e)}")
             st.error("Failed to initialize application. Please ensure all dependencies are installed.")
             return
 
         # Create tabs
-        print("[Emoji Story Builder] Creating tabs...")
+        _dbg("[Emoji Story Builder] Creating tabs...")
         main_tab, history_tab, readme_tab = st.tabs(["Story Builder", "History", "Documentation"])
 
         # Main tab content
         with main_tab:
+            try:
+                # Emoji count selector
+                emoji_count = st.number_input(
+                    "Number of Emojis",
+                    min_value=1,
+                    max_value=10,
+                    value=3
+                )
         
-            # Emoji count selector
-            emoji_count = st.number_input(
-                "Number of Emojis",
-                min_value=1,
-                max_value=10,
-                value=3
-            )
-        
-            # Control buttons
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button("Generate New Emojis"):
-                    try:
+                # Control buttons
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.button("Generate New Emojis"):
+                        flush_pending_save(data_store, force=True)
                         st.session_state.current_emojis = emoji_manager.get_random_emojis(emoji_count)
-                        save_current_session(data_store)
-                    except Exception as e:
-                        logger.error(f"Failed to generate emojis: {str(e)}")
-                        st.error("Failed to generate emojis. Please try again.")
+                        save_current_session(data_store, force=True)
                 
-            with col2:
-                if st.button("Clear Results"):
-                    try:
+                with col2:
+                    if st.button("Clear Results"):
+                        flush_pending_save(data_store, force=True)
                         st.session_state.current_emojis = []
                         st.session_state.notes = ""
                         emoji_manager.reset_session()
                         logger.info("Session cleared")
-                    except Exception as e:
-                        logger.error(f"Failed to clear session: {str(e)}")
-                        st.error("Failed to clear results. Please try again.")
             
-            # Render emoji section
-            render_emoji_section(emoji_manager)
+                # Render emoji section
+                render_emoji_section(emoji_manager)
 
-            # --- Story Generation Controls ---
-            st.divider()
+                # --- Story Generation Controls ---
+                st.divider()
             
-            # Check Ollama Status
-            ollama_online, status_msg = ollama_client.check_status()
-            if ollama_online:
-                st.success(f"🟢 {status_msg}")
-            else:
-                st.error(f"🔴 {status_msg} - Please start Ollama to enable story generation.")
-
-            # Get available models
-            models = []
-            selected_model = None
-            if ollama_online:
-                models = ollama_client.get_available_models()
-                if not models:
-                    st.warning("No local models found. Use 'ollama pull <modelname>' to download one.")
+                # Check Ollama Status
+                # The client reuses its last status for a few seconds across reruns
+                ollama_online, status_msg = ollama_client.check_status()
+                if ollama_online:
+                    st.success(f"🟢 {status_msg}")
                 else:
-                    selected_model = st.selectbox(
-                        "Select Ollama Model",
-                        options=models,
-                        index=0,
-                        help="Choose the model to use for story generation."
-                    )
-
-            if st.session_state.current_emojis:
-                st.markdown("**Generate a Story from these Emojis**")
-                word_count = st.slider(
-                    "Approximate Story Length (words)",
-                    min_value=50,
-                    max_value=500,
-                    value=150,
-                    step=10,
-                    help="Target number of words for the generated story."
-                )
-                temperature = st.slider(
-                    "Creativity (Temperature)",
-                    min_value=0.1,
-                    max_value=1.5,
-                    value=1.2,
-                    step=0.05,
-                    help="Higher values = more creative, lower = more focused."
-                )
-                
-                if st.button("Generate Story from Emojis", disabled=not (ollama_online and selected_model)):
-                    try:
-                        # Log the request to browser console
-                        browser_log("OLLAMA_REQUEST", {
-                            "model": selected_model,
-                            "emojis": st.session_state.current_emojis,
-                            "word_count": word_count,
-                            "temperature": temperature
-                        })
-                        
-                        with st.spinner(f"Generating story using {selected_model}..."):
-                            story = ollama_client.generate_story(
-                                st.session_state.current_emojis,
-                                model=selected_model,
-                                word_count=word_count,
-                                temperature=temperature
-                            )
-                        
-                        # Log the response to browser console
-                        browser_log("OLLAMA_RESPONSE", {"story_length": len(story), "story_preview": story[:100] + "..."})
-                        
-                        st.session_state.generated_story = story
-                        st.rerun() # Force a rerun to update the text area immediately
-                    except Exception as e:
-                        logger.error(f"Failed to generate story: {str(e)}")
-                        st.error("Failed to generate story. Please check Ollama server and try again.")
-                
-                if st.session_state.generated_story:
-                    st.text_area(
-                        "Generated Story",
-                        value=st.session_state.generated_story,
-                        height=250,
-                        key="generated_story_area"
-                    )
-            # --- End Story Generation Controls ---
-
-            # Notes section
-            try:
+                    st.error(f"🔴 {status_msg} - Please start Ollama to enable story generation.")
+
+                render_story_controls(ollama_client, ollama_online)
+                # --- End Story Generation Controls ---
+
+                # Notes section
                 st.text_area(
                     "Your Story",
                     key="notes",
@@ -350,47 +525,38 @@ def main():
                     placeholder="Write your story here...",
                     on_change=lambda: save_current_session(data_store)
                 )
-            except Exception as e:
-                logger.error(f"Failed to render notes section: {str(e)}")
-                st.error("Failed to display notes section. Please refresh the page.")
+                if st.button("Save now"):
+                    save_current_session(data_store, force=True)
             
-            # Display session history
-            if st.checkbox("Show Session History"):
-                try:
-                    sessions = data_store.get_all_sessions()
-                    for session in sessions:
-                        with st.expander(f"Session from {session['timestamp']}"):
-                            st.write("Emojis: " + " ".join(session["emojis"]))
-                            st.write("Notes:", session["notes"])
-                except Exception as e:
-                    logger.error(f"Failed to display session history: {str(e)}")
-                    st.error("Failed to load session history.")
-
-            # --- Debug Console ---
-            st.divider()
-            with st.expander("🛠️ Debug Console", expanded=False):
-                st.write("### Application State")
-                st.json({
-                    "current_emojis": st.session_state.current_emojis,
-                    "generated_story_length": len(st.session_state.get('generated_story', '')),
-                    "ollama_status": status_msg,
-                    "timestamp": datetime.now().isoformat()
-                })
-                st.write("### Internal Logs")
-                # Showing a mock log for now or we could read from logs/error.log
-                try:
-                    with open('logs/error.log', 'r') as f:
-                        log_lines = f.readlines()
-                        st.text_area("Recent Logs", value="".join(log_lines[-10:]), height=150)
-                except:
-                    st.info("No logs found yet.")
+                # Display session history
+                render_session_history(data_store)
+
+                # --- Debug Console ---
+                st.divider()
+                with st.expander("🛠️ Debug Console", expanded=False):
+                    st.write("### Application State")
+                    st.json({
+                        "current_emojis": st.session_state.current_emojis,
+                        "generated_story_length": len(st.session_state.get('generated_story', '')),
+                        "ollama_status": status_msg,
+                        "timestamp": datetime.now().isoformat()
+                    })
+                    st.write("### Internal Logs")
+                    # Only the tail of logs/error.log is read, so cost stays flat as the log grows
+                    try:
+                        logger.flush()
+                        log_tail, _ = _load_log_tail('logs/error.log', LOG_TAIL_BYTES)
+                        st.text_area("Recent Logs", value="\n".join(log_tail.splitlines()[-10:]), height=150)
+                    except:
+                        st.info("No logs found yet.")
+            except Exception as e:
+                logger.error(f"Failed to render Story Builder tab: {str(e)}")
+                st.error("Failed to display the Story Builder. Please refresh the page.")
 
         with readme_tab:
             try:
-                # readme.md is in the project root
-                with open('readme.md', 'r', encoding='utf-8') as f:
-                    readme_content = f.read()
-                markdown_with_mermaid(readme_content)
+                readme_path = str(README_PATH)
+                markdown_with_mermaid(_readme_segments(readme_path, os.path.getmtime(readme_path)))
             except Exception as e:
                 logger.error(f"Failed to load readme: {str(e)}")
                 st.error("Failed to load documentation. Please check if readme.md exists.")
@@ -398,24 +564,29 @@ def main():
         # History tab content
         with history_tab:
             try:
-                print("[Emoji Story Builder] Rendering History tab...")
-                with open('data/sessions.json', 'r', encoding='utf-8') as f:
-                    sessions_json = f.read()
+                _dbg("[Emoji Story Builder] Rendering History tab...")
+                sessions_json, truncated = _load_tail(
+                    data_store.data_file,
+                    os.path.getmtime(data_store.data_file),
+                    HISTORY_TAIL_BYTES
+                )
+                if truncated:
+                    st.caption(f"Showing the most recent {HISTORY_TAIL_BYTES // 1024} KB of session history.")
                 st.code(sessions_json, language='json')
             except Exception as e:
-                print(f"[Emoji Story Builder] History tab error: {str(e)}")
+                _dbg(f"[Emoji Story Builder] History tab error: {str(e)}")
                 logger.error(f"Failed to load sessions history: {str(e)}")
-                st.error("Failed to load sessions history. Please check if sessions.json exists.")
+                st.error("Failed to load sessions history. Please check if sessions.jsonl exists.")
         
-        print("[Emoji Story Builder] Main loop complete.")
+        _dbg("[Emoji Story Builder] Main loop complete.")
         # Flush logs at the end of the run
         flush_browser_logs()
     except Exception as e:
-        print(f"[Emoji Story Builder] Critical application error: {str(e)}")
+        _dbg(f"[Emoji Story Builder] Critical application error: {str(e)}")
         logger.error(f"Application error: {str(e)}")
         st.error("An error occurred. Please refresh the page and try again.")
 
 if __name__ == "__main__":
     main()
-    print("[Emoji Story Builder] Script execution finished.")
+    _dbg("[Emoji Story Builder] Script execution finished.")
     
@@ -1,13 +1,17 @@
 """
 Data storage implementation for the Emoji Story Builder.
-Handles JSON operations with atomic writes and ISO 8601 timestamps.
+Handles append-only JSON Lines storage with atomic compaction and ISO 8601 timestamps.
 """
 
+import atexit
 import json
+import logging
 import os
-from datetime import datetime
+import queue
+import threading
+from datetime import datetime, timezone
 import shutil
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, TextIO, Any
 from uuid import uuid4
 
 try:
@@ -18,84 +22,215 @@ except ImportError:
 
 from src.logger import get_logger
 
-# Ensure required directories exist
-os.makedirs('logs', exist_ok=True)
-os.makedirs('data', exist_ok=True)
-
 logger = get_logger()
 
+# Queue markers for the writer thread: stop after this batch / retry failed sessions
+_STOP = object()
+_RETRY = object()
+
 class DataStore:
     def __init__(self, data_dir: str = "data"):
         """Initialize the data store with the specified data directory."""
         try:
             self.data_dir = data_dir
-            self.data_file = os.path.join(data_dir, "sessions.json")
+            self.data_file = os.path.join(data_dir, "sessions.jsonl")
+            self.legacy_file = os.path.join(data_dir, "sessions.json")
             self.lock_file = f"{self.data_file}.lock"
-            
+            self._fh: Optional[TextIO] = None
+
             # Ensure data directory exists
             if not os.path.exists(data_dir):
                 os.makedirs(data_dir)
                 logger.info(f"Created data directory: {data_dir}")
-            
+
             # Initialize data file if it doesn't exist
             if not os.path.exists(self.data_file):
                 self._initialize_data_file()
-                
+
+            # Keep one handle open for the lifetime of the store
+            self._get_handle()
+
+            # Write-behind queue: saves return immediately and a background
+            # thread appends whatever has accumulated in one locked, fsynced write
+            self._queue: "queue.Queue[Any]" = queue.Queue()
+            # Sessions from a failed append, kept for the next attempt, and its error
+            self._failed: List[Dict[str, Any]] = []
+            self._write_error: Optional[Exception] = None
+            self._writer = threading.Thread(target=self._writer_loop, name="DataStoreWriter", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
         except Exception as e:
             logger.error(f"Failed to initialize DataStore: {str(e)}")
             raise
 
+    def _get_handle(self) -> TextIO:
+        """
+        Return the long-lived read/append handle, reopening it if the data file
+        was replaced (e.g. by compaction in this or another process).
+        """
+        if self._fh is not None:
+            try:
+                if os.fstat(self._fh.fileno()).st_ino == os.stat(self.data_file).st_ino:
+                    return self._fh
+            except FileNotFoundError:
+                pass
+            self._fh.close()
+        self._fh = open(self.data_file, 'a+', encoding='utf-8')
+        return self._fh
+
+    def flush(self) -> None:
+        """
+        Block until every queued session has been written to disk.
+
+        Sessions from an earlier failed write are retried first; if they still
+        cannot be written an IOError is raised and they stay queued for later.
+        """
+        if self._failed:
+            self._queue.put(_RETRY)
+        self._queue.join()
+        if self._failed:
+            raise IOError(
+                f"{len(self._failed)} queued sessions could not be written: {self._write_error}"
+            ) from self._write_error
+
+    def close(self) -> None:
+        """Flush pending sessions, stop the writer thread and close the data file handle."""
+        if self._writer.is_alive():
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Closing data store with unsaved sessions: {str(e)}")
+            self._queue.put(_STOP)
+            self._writer.join()
+        atexit.unregister(self.close)
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
     def _initialize_data_file(self) -> None:
-        """Create the initial data file structure."""
+        """Create the data file, migrating sessions from a legacy sessions.json if present."""
         try:
-            with FileLock(self.lock_file):
-                initial_data = {
-                    "sessions": []
-                }
-                with open(self.data_file, 'w', encoding='utf-8') as f:
-                    json.dump(initial_data, f, indent=2)
-                logger.info(f"Initialized data file: {self.data_file}")
+            legacy_sessions = self._read_legacy_sessions()
+            self._write_data(legacy_sessions)
+            if legacy_sessions:
+                logger.info(f"Migrated {len(legacy_sessions)} sessions from: {self.legacy_file}")
+            logger.info(f"Initialized data file: {self.data_file}")
         except Exception as e:
             logger.error(f"Failed to initialize data file: {str(e)}")
             raise
 
-    def _read_data(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Read the current data from the JSON file."""
+    def _read_legacy_sessions(self) -> List[Dict[str, Any]]:
+        """Read sessions from the legacy whole-document sessions.json, if any."""
+        if not os.path.exists(self.legacy_file):
+            return []
         try:
-            with FileLock(self.lock_file):
-                if not os.path.exists(self.data_file):
-                    logger.warning("Data file not found, creating new one")
-                    self._initialize_data_file()
-                
-                with open(self.data_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    logger.info("Successfully read data file")
-                    return data
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                return json.load(f).get("sessions", [])
         except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON in data file: {str(e)}")
+            logger.error(f"Invalid JSON in legacy data file: {str(e)}")
             # Backup corrupted file
-            backup_file = f"{self.data_file}.backup"
-            shutil.copy2(self.data_file, backup_file)
+            backup_file = f"{self.legacy_file}.backup"
+            shutil.copy2(self.legacy_file, backup_file)
             logger.info(f"Backed up corrupted file to: {backup_file}")
-            # Create new data file
-            self._initialize_data_file()
-            return {"sessions": []}
+            return []
+
+    def _iter_sessions(self) -> Iterator[Dict[str, Any]]:
+        """Yield sessions from the JSON Lines file, skipping corrupted lines."""
+        # Read-your-writes: let queued saves land before reading
+        self._queue.join()
+        try:
+            if not os.path.exists(self.data_file):
+                logger.warning("Data file not found, creating new one")
+                self._initialize_data_file()
+
+            with FileLock(self.lock_file):
+                f = self._get_handle()
+                f.seek(0)
+                lines = f.readlines()
         except Exception as e:
             logger.error(f"Failed to read data: {str(e)}")
             raise
 
-    def _write_data(self, data: Dict[str, List[Dict[str, Any]]]) -> None:
-        """Write data to the JSON file atomically."""
-        temp_file = f"{self.data_file}.tmp"
+        # Parse outside the lock so writers are not blocked while callers consume
+        yield from self._parse_lines(lines)
+
+    def _parse_lines(self, lines: List[str]) -> Iterator[Dict[str, Any]]:
+        """Yield sessions from JSON lines, skipping blank and corrupted lines."""
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.error(f"Skipping invalid JSON on line {line_number} of data file: {str(e)}")
+
+    def _append_sessions(self, sessions: List[Dict[str, Any]]) -> None:
+        """Append sessions as JSON lines and sync them to disk in one write."""
         try:
             with FileLock(self.lock_file):
-                # Write to temporary file first
-                with open(temp_file, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2)
-                
-                # Rename temporary file to actual file (atomic operation)
-                os.replace(temp_file, self.data_file)
-                logger.info("Successfully wrote data to file")
+                # Append mode writes at the end of the file regardless of read position
+                f = self._get_handle()
+                f.write("".join(json.dumps(session) + '\n' for session in sessions))
+                f.flush()
+                os.fsync(f.fileno())
+                logger.debug("Successfully appended %d sessions to file", len(sessions))
+        except Exception as e:
+            logger.error(f"Failed to append sessions: {str(e)}")
+            raise
+
+    def _writer_loop(self) -> None:
+        """
+        Drain the save queue, coalescing pending sessions into one append.
+
+        A failed batch is kept in self._failed and retried with the next batch,
+        so a transient lock timeout or disk error does not drop sessions.
+        """
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            sessions = self._failed + [item for item in batch if item is not _STOP and item is not _RETRY]
+            try:
+                if sessions:
+                    self._append_sessions(sessions)
+                self._failed = []
+                self._write_error = None
+            except Exception as e:
+                logger.error(f"Keeping {len(sessions)} unsaved sessions for retry: {str(e)}", exc_info=False)
+                self._failed = sessions
+                self._write_error = e
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if _STOP in batch:
+                return
+
+    def _write_data(self, sessions: List[Dict[str, Any]]) -> None:
+        """Rewrite the whole JSON Lines file atomically."""
+        with FileLock(self.lock_file):
+            self._replace_data(sessions)
+
+    def _replace_data(self, sessions: List[Dict[str, Any]]) -> None:
+        """Write sessions to a temporary file and swap it in; the caller holds the file lock."""
+        temp_file = f"{self.data_file}.tmp"
+        try:
+            # Write to temporary file first
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                for session in sessions:
+                    f.write(json.dumps(session) + '\n')
+
+            # Windows cannot replace a file that is still open; _get_handle reopens it
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+            # Rename temporary file to actual file (atomic operation)
+            os.replace(temp_file, self.data_file)
+            logger.debug("Successfully wrote data to file")
         except Exception as e:
             logger.error(f"Failed to write data: {str(e)}")
             if os.path.exists(temp_file):
@@ -106,15 +241,29 @@ class DataStore:
                     logger.error(f"Failed to clean up temporary file: {str(cleanup_error)}")
             raise
 
+    def _compact(self) -> None:
+        """Rewrite the data file, dropping corrupted and blank lines."""
+        self._queue.join()
+        # One lock across read and rewrite so no append can land in between and be lost
+        with FileLock(self.lock_file):
+            f = self._get_handle()
+            f.seek(0)
+            self._replace_data(list(self._parse_lines(f.readlines())))
+
     def save_session(self, emojis: List[str], notes: str, session_id: Optional[str] = None) -> str:
         """
         Save a new session with emojis and notes.
-        
+
+        The session is queued and written by a background thread; reads and
+        flush() wait for queued sessions to reach disk. If an earlier
+        background write failed, this call waits for the retry and raises
+        IOError if it fails again; the session stays queued either way.
+
         Args:
             emojis: List of emojis used in the session
             notes: User's notes for the session
             session_id: Optional session ID (will be generated if not provided)
-            
+
         Returns:
             session_id: The ID of the saved session
         """
@@ -122,22 +271,25 @@ class DataStore:
             if session_id is None:
                 session_id = str(uuid4())
 
-            timestamp = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-            
+            timestamp = datetime.now(timezone.utc).isoformat(timespec='microseconds').replace('+00:00', 'Z')
+
             new_session = {
                 "session_id": session_id,
                 "timestamp": timestamp,
                 "emojis": emojis,
                 "notes": notes
             }
-            
-            data = self._read_data()
-            data["sessions"].append(new_session)
-            self._write_data(data)
-            
-            logger.info(f"Session saved successfully: {session_id}")
+
+            if not self._writer.is_alive():
+                raise RuntimeError("DataStore is closed")
+
+            self._queue.put(new_session)
+            if self._write_error is not None:
+                self.flush()
+
+            logger.debug("Session queued for saving: %s", session_id)
             return session_id
-            
+
         except Exception as e:
             logger.error(f"Failed to save session: {str(e)}")
             raise
@@ -145,10 +297,9 @@ class DataStore:
     def get_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a specific session by ID."""
         try:
-            data = self._read_data()
-            for session in data["sessions"]:
+            for session in self._iter_sessions():
                 if session["session_id"] == session_id:
-                    logger.info(f"Retrieved session: {session_id}")
+                    logger.debug("Retrieved session: %s", session_id)
                     return session
             logger.warning(f"Session not found: {session_id}")
             return None
@@ -159,9 +310,9 @@ class DataStore:
     def get_all_sessions(self) -> List[Dict[str, Any]]:
         """Retrieve all sessions."""
         try:
-            data = self._read_data()
-            sessions = data["sessions"]
-            logger.info(f"Retrieved {len(sessions)} sessions")
+            sessions = list(self._iter_sessions())
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Retrieved %d sessions", len(sessions))
             return sessions
         except Exception as e:
             logger.error(f"Failed to retrieve all sessions: {str(e)}")
@@ -176,7 +327,7 @@ if __name__ == "__main__":
             notes="Test session"
         )
         print(f"Saved session: {session_id}")
-        
+
         session = data_store.get_session(session_id)
         print(f"Retrieved session: {session}")
     except Exception as e:
@@ -1,33 +1,28 @@
 """
 Emoji manager implementation for the Emoji Story Builder.
-Handles emoji selection, uniqueness tracking, and size calculations.
+Handles emoji selection and uniqueness tracking.
 """
 
+import functools
 import random
 from typing import List, Set, Tuple, Dict
-import os
 from datetime import datetime
 from pathlib import Path
 
 from src.logger import get_logger
 
-# Ensure logs directory exists
-os.makedirs('logs', exist_ok=True)
-
 logger = get_logger()
 
+@functools.lru_cache(maxsize=1)
 def load_streamlit_emojis() -> Dict[str, str]:
-    """Load Streamlit emoji mappings from file."""
+    """Load Streamlit emoji mappings from file, parsed once per process."""
     try:
-        emoji_dict = {}
         emoji_file = Path(__file__).parent / 'streamlitemojis.txt'
-        
-        with open(emoji_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip():
-                    emoji, shortcode = line.strip().split(':')
-                    emoji_dict[emoji] = shortcode
-                    
+        text = emoji_file.read_text(encoding='utf-8')
+        emoji_dict = dict(
+            line.split(':', 1) for line in map(str.strip, text.splitlines()) if line
+        )
+
         logger.info(f"Loaded {len(emoji_dict)} Streamlit emojis")
         return emoji_dict
     except Exception as e:
@@ -37,17 +32,25 @@ def load_streamlit_emojis() -> Dict[str, str]:
 class EmojiManager:
     def __init__(self):
         """Initialize the emoji manager."""
-        self.used_emojis: Set[str] = set()
-        self.all_emojis = self._load_emojis()
+        self.all_emojis: Tuple[str, ...] = self._load_emojis()
+        # Shuffled deck dealt from a cursor; everything before the cursor is used
+        self._deck = list(self.all_emojis)
+        random.shuffle(self._deck)
+        self._cursor = 0
+
+    @property
+    def used_emojis(self) -> Set[str]:
+        """Emojis dealt since the last reset."""
+        return set(self._deck[:self._cursor])
         
-    def _load_emojis(self) -> List[str]:
-        """Load all available Streamlit emojis."""
+    def _load_emojis(self) -> Tuple[str, ...]:
+        """Load all available Streamlit emojis as an immutable pool."""
         try:
             # Get all emoji characters from Streamlit emoji mappings
             emoji_dict = load_streamlit_emojis()
-            emoji_list = list(emoji_dict.keys())
-            logger.info(f"Loaded {len(emoji_list)} Streamlit emojis")
-            return emoji_list
+            emoji_pool = tuple(emoji_dict.keys())
+            logger.info(f"Loaded {len(emoji_pool)} Streamlit emojis")
+            return emoji_pool
         except Exception as e:
             logger.error(f"Failed to load emojis: {str(e)}")
             raise
@@ -55,8 +58,9 @@ class EmojiManager:
     def reset_session(self) -> None:
         """Reset the session's used emojis tracking."""
         try:
-            self.used_emojis.clear()
-            logger.info("Session emoji tracking reset")
+            random.shuffle(self._deck)
+            self._cursor = 0
+            logger.debug("Session emoji tracking reset")
         except Exception as e:
             logger.error(f"Failed to reset session: {str(e)}")
             raise
@@ -75,21 +79,15 @@ class EmojiManager:
             # Validate count
             count = max(1, min(10, count))
             
-            # Calculate available emojis
-            available_emojis = [e for e in self.all_emojis if e not in self.used_emojis]
-            
-            if len(available_emojis) < count:
+            if self._cursor + count > len(self._deck):
                 logger.warning("Not enough unique emojis available, resetting tracking")
                 self.reset_session()
-                available_emojis = self.all_emojis
-            
-            # Select random emojis
-            selected_emojis = random.sample(available_emojis, count)
             
-            # Track used emojis
-            self.used_emojis.update(selected_emojis)
+            # Deal the next emojis from the shuffled deck: O(count) per call
+            selected_emojis = self._deck[self._cursor:self._cursor + count]
+            self._cursor += count
             
-            logger.info(f"Generated {count} random emojis")
+            logger.debug("Generated %d random emojis", count)
             return selected_emojis
             
         except Exception as e:
@@ -103,9 +101,5 @@ if __name__ == "__main__":
         # Generate 5 random emojis
         emojis = manager.get_random_emojis(5)
         print(f"Random emojis: {emojis}")
-        
-        # Calculate layout for 1920x1080 screen
-        layout = manager.get_emoji_layout(emojis, 1920, 1080)
-        print(f"Layout: {layout}")
     except Exception as e:
         logger.error(f"Example usage failed: {str(e)}")
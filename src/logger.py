@@ -3,27 +3,40 @@ Logger implementation for the Emoji Story Builder.
 Implements singleton pattern for centralized logging with ISO 8601 timestamps.
 """
 
+import atexit
 import logging
 import os
+import queue
 import sys
-from datetime import datetime
-from logging.handlers import TimedRotatingFileHandler
+import time
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener, RotatingFileHandler
 from typing import Optional
 
-# Ensure logs directory exists
-try:
-    os.makedirs('logs', exist_ok=True)
-except Exception as e:
-    print(f"Error creating logs directory: {str(e)}")
-    raise
+# logs/error.log rolls over at 10 MB, keeping 5 old files
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+# Console output is opt-in, with the same ESB_DEBUG=1 switch as app.py's tracing
+CONSOLE_LOGGING = os.getenv('ESB_DEBUG') == '1'
 
 class Logger:
+    """
+    Process-wide wrapper around the 'emoji_story_builder' logger.
+
+    Pass format arguments separately (logger.debug("Loaded %d items", n)) so
+    disabled levels return before the message is built.
+    """
+
+    __slots__ = ("_logger", "_queue", "_listener", "_file_buffer")
+
     _instance: Optional['Logger'] = None
-    _logger: Optional[logging.Logger] = None
 
     def __new__(cls) -> 'Logger':
         if cls._instance is None:
             cls._instance = super(Logger, cls).__new__(cls)
+            cls._instance._logger = None
+            cls._instance._listener = None
+            cls._instance._file_buffer = None
             cls._instance._initialize_logger()
         return cls._instance
 
@@ -35,36 +48,69 @@ class Logger:
         try:
             # Initialize logger
             self._logger = logging.getLogger('emoji_story_builder')
-            self._logger.setLevel(logging.DEBUG)
+            # No handler accepts DEBUG, so disable it at the logger to skip record creation
+            self._logger.setLevel(logging.INFO)
+            # Records are fully handled here; don't let root handlers emit them again
+            self._logger.propagate = False
 
             # Create formatter with ISO 8601 timestamps
             formatter = logging.Formatter(
                 '[%(asctime)s] [%(levelname)s] %(message)s',
-                datefmt='%Y-%m-%dT%H:%M:%S'  # Simplified format to avoid errors
+                datefmt='%Y-%m-%dT%H:%M:%SZ'
             )
+            # Render asctime in UTC, marked with Z like the session timestamps
+            formatter.converter = time.gmtime
 
-            # File handler with daily rotation
+            # Size-capped file handler; the file is only opened once an error is logged
             try:
-                file_handler = TimedRotatingFileHandler(
+                os.makedirs('logs', exist_ok=True)
+                file_handler = RotatingFileHandler(
                     'logs/error.log',
-                    when='midnight',
-                    interval=1,
-                    backupCount=30,
-                    encoding='utf-8'
+                    maxBytes=LOG_MAX_BYTES,
+                    backupCount=LOG_BACKUP_COUNT,
+                    encoding='utf-8',
+                    delay=True
                 )
                 file_handler.setFormatter(formatter)
                 file_handler.setLevel(logging.ERROR)
-                self._logger.addHandler(file_handler)
+
+                # Buffer error records so a burst costs one write instead of one per
+                # record; CRITICAL records, a full buffer, flush() and exit write through
+                self._file_buffer = MemoryHandler(capacity=64, flushLevel=logging.CRITICAL, target=file_handler)
+                self._file_buffer.setLevel(logging.ERROR)
+                self._logger.addHandler(self._file_buffer)
+                atexit.register(self._file_buffer.close)
             except Exception as e:
                 print(f"Error setting up file handler: {str(e)}")
                 raise
 
-            # Stream handler for console output
+            if not CONSOLE_LOGGING:
+                # Only the ERROR file handler remains, so skip lower records entirely
+                self._logger.setLevel(logging.ERROR)
+                return
+
+            # Stream handlers for console output. INFO and WARNING go through a
+            # queue drained by a background thread so callers never block on
+            # stdout; ERROR and above are written synchronously, like the file
+            # handler, so crash context is not lost in the queue.
             try:
                 console_handler = logging.StreamHandler(sys.stdout)
                 console_handler.setFormatter(formatter)
                 console_handler.setLevel(logging.INFO)
-                self._logger.addHandler(console_handler)
+
+                error_console_handler = logging.StreamHandler(sys.stdout)
+                error_console_handler.setFormatter(formatter)
+                error_console_handler.setLevel(logging.ERROR)
+                self._logger.addHandler(error_console_handler)
+
+                self._queue = queue.Queue(-1)
+                queue_handler = QueueHandler(self._queue)
+                queue_handler.addFilter(lambda record: record.levelno < logging.ERROR)
+                self._logger.addHandler(queue_handler)
+
+                self._listener = QueueListener(self._queue, console_handler, respect_handler_level=True)
+                self._listener.start()
+                atexit.register(self._listener.stop)
             except Exception as e:
                 print(f"Error setting up console handler: {str(e)}")
                 raise
@@ -76,72 +122,48 @@ class Logger:
             print(f"Error initializing logger: {str(e)}")
             raise
 
-    def _ensure_logger(self) -> None:
-        """Ensure logger is initialized."""
-        if self._logger is None:
-            self._initialize_logger()
+    def flush(self) -> None:
+        """Write buffered error records to logs/error.log."""
+        if self._file_buffer is not None:
+            self._file_buffer.flush()
 
-    def _log(self, level: int, message: str, exc_info: bool = False) -> None:
-        """Internal method to handle logging with proper timestamp conversion."""
-        try:
-            self._ensure_logger()
-            if self._logger is None:
-                raise RuntimeError("Logger initialization failed")
-            
-            # Ensure timestamp is in UTC
-            from datetime import timezone
-            timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S')
-            formatted_message = f"{message}"
-            
-            self._logger.log(level, formatted_message, exc_info=exc_info)
-        except Exception as e:
-            # If logging fails, print to stderr as last resort
-            print(f"Logging failed: {str(e)}", file=sys.stderr)
-            if exc_info:
-                import traceback
-                traceback.print_exc(file=sys.stderr)
+    def isEnabledFor(self, level: int) -> bool:
+        """Check whether a record at this level would be processed."""
+        return self._logger.isEnabledFor(level)
 
-    def error(self, message: str, exc_info: bool = True) -> None:
+    def error(self, message: str, *args, exc_info: bool = True) -> None:
         """Log an error message with stack trace."""
-        try:
-            self._log(logging.ERROR, message, exc_info)
-        except Exception as e:
-            print(f"Error logging failed: {str(e)}", file=sys.stderr)
-            if exc_info:
-                import traceback
-                traceback.print_exc(file=sys.stderr)
+        if self._logger.isEnabledFor(logging.ERROR):
+            self._logger.log(logging.ERROR, message, *args, exc_info=exc_info)
 
-    def warning(self, message: str) -> None:
-        """Log a warning message."""
-        try:
-            self._log(logging.WARNING, message)
-        except Exception as e:
-            print(f"Warning logging failed: {str(e)}", file=sys.stderr)
+    def warning(self, message: str, *args) -> None:
+        """Log a warning message; args are %-formatted lazily."""
+        if self._logger.isEnabledFor(logging.WARNING):
+            self._logger.log(logging.WARNING, message, *args)
 
-    def info(self, message: str) -> None:
-        """Log an info message."""
-        try:
-            self._log(logging.INFO, message)
-        except Exception as e:
-            print(f"Info logging failed: {str(e)}", file=sys.stderr)
+    def info(self, message: str, *args) -> None:
+        """Log an info message; args are %-formatted lazily."""
+        if self._logger.isEnabledFor(logging.INFO):
+            self._logger.log(logging.INFO, message, *args)
 
-    def debug(self, message: str) -> None:
-        """Log a debug message."""
-        try:
-            self._log(logging.DEBUG, message)
-        except Exception as e:
-            print(f"Debug logging failed: {str(e)}", file=sys.stderr)
+    def debug(self, message: str, *args) -> None:
+        """Log a debug message; args are %-formatted lazily."""
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.log(logging.DEBUG, message, *args)
 
-# Global logger instance
-try:
-    logger = Logger()
-except Exception as e:
-    print(f"Failed to create global logger instance: {str(e)}", file=sys.stderr)
-    raise
+# Global logger instance, created on first use so importing this module stays cheap
+_GLOBAL: Optional[Logger] = None
 
 def get_logger() -> Logger:
-    """Get the global logger instance."""
-    return logger
+    """Get the global logger instance, creating it on first call."""
+    global _GLOBAL
+    if _GLOBAL is None:
+        try:
+            _GLOBAL = Logger()
+        except Exception as e:
+            print(f"Failed to create global logger instance: {str(e)}", file=sys.stderr)
+            raise
+    return _GLOBAL
 
 # Example usage:
 if __name__ == '__main__':
@@ -1,20 +1,148 @@
 import requests
 import json
 import logging
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# orjson decodes the streamed NDJSON lines straight from bytes; fall back to stdlib json
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+_PROMPT_TMPL = (
+    "Write a creative story with a beginning, middle, and end, inspired by these emojis: {emojis}. "
+    "The story should be about {words} words long."
+)
+
+# Ollama streams lines such as {"model":...,"response":"Once","done":false};
+# intermediate lines have their text pulled out by one precompiled regex scan
+# instead of being parsed into a dict
+_RESP_RE = re.compile(rb'"response"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_DONE_TRUE_RE = re.compile(rb'"done"\s*:\s*true')
+
+
+def _extract_response(line):
+    """
+    Return the response text of an intermediate streamed line, or None when the
+    line needs a full JSON parse (final chunk or another shape).
+    """
+    if _DONE_TRUE_RE.search(line):
+        return None
+    match = _RESP_RE.search(line)
+    if match is None:
+        return None
+    text = match.group(1)
+    if b"\\" in text:
+        # Let the JSON decoder resolve escapes such as \" and \u00e9
+        return _json_loads(b'"' + text + b'"')
+    return text.decode("utf-8")
+
+# Retry transient gateway errors on generate requests with exponential backoff
+# (0.5s base). Connection errors are left to _post_generate's bounded retry
+# (GENERATE_ATTEMPTS tries, sleeping 2s then 4s), so with Ollama offline a
+# generate call fails after about 6s, or about 15s when each connect attempt
+# times out. The /api/tags probes (GET) are not retried, so check_status
+# reports a gateway error's status code at once, and when retries run out the
+# last response is returned rather than a RetryError so its status still
+# reaches the caller.
+OLLAMA_RETRY = Retry(
+    total=3,
+    connect=0,
+    backoff_factor=0.5,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset(["POST"]),
+    raise_on_status=False,
+)
+
+# Seconds a check_status result is reused before Ollama is probed again
+STATUS_CACHE_TTL = 3.0
+
+# Seconds a successful model list is reused before /api/tags is queried again
+MODELS_CACHE_TTL = 30.0
+
+# Recent generations remembered for generate_story(use_cache=True)
+RESULT_CACHE_SIZE = 5
+
+# (connect, read) timeouts for generation: fail fast when Ollama is down, but allow
+# up to a minute between streamed lines while a model loads
+GENERATE_TIMEOUT = (3.0, 60.0)
+
+# Attempts and initial backoff (doubled per retry) for connecting to /api/generate
+GENERATE_ATTEMPTS = 3
+GENERATE_RETRY_DELAY = 2.0
+
+# Read size for the streamed generate response
+STREAM_CHUNK_SIZE = 8192
+
+# Fields of Ollama's final streamed chunk that are worth reporting
+STREAM_STAT_FIELDS = ("eval_count", "eval_duration", "prompt_eval_count", "total_duration", "load_duration")
 
 
 class OllamaClient:
     """Client for interacting with the local Ollama API."""
 
+    __slots__ = (
+        "base_url",
+        "model",
+        "logger",
+        "_session",
+        "_status_cache",
+        "_result_cache",
+        "_models_cache",
+    )
+
     def __init__(self, base_url="http://localhost:11434", model="llama3.2"):
         self.base_url = base_url
         self.model = model
-        self.logger = logging.getLogger("emoji_builder.ollama")
+        # Child of the app logger, so records reach its handlers once and stop there
+        self.logger = logging.getLogger("emoji_story_builder.ollama")
+        # Pooled keep-alive connections so each call skips the TCP handshake
+        self._session = requests.Session()
+        self._session.mount(
+            "http://",
+            HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=OLLAMA_RETRY),
+        )
+        # (checked_at, online, message) from the last check_status call
+        self._status_cache = None
+        # ((emojis, model, word_count, temperature), story) for recent generations
+        self._result_cache = deque(maxlen=RESULT_CACHE_SIZE)
+        # (fetched_at, model names, name set) from the last successful /api/tags call
+        self._models_cache = None
+
+    def close(self):
+        """Close the pooled connections held by the session."""
+        self._session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def check_status(self):
-        """Check if the Ollama server is running and reachable."""
+        """
+        Check if the Ollama server is running and reachable.
+
+        The result, including failures, is reused for STATUS_CACHE_TTL seconds
+        so reruns do not poll an offline server in a tight loop.
+        """
+        cached = self._status_cache
+        if cached is not None and time.monotonic() - cached[0] < STATUS_CACHE_TTL:
+            return cached[1], cached[2]
+        online, msg = self._probe_status()
+        self._status_cache = (time.monotonic(), online, msg)
+        return online, msg
+
+    def _probe_status(self):
+        """Query /api/tags once and describe the result."""
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=2)
+            response = self._session.get(f"{self.base_url}/api/tags", timeout=2)
             if response.status_code == 200:
                 return True, "Ollama Running"
             return False, f"Ollama Error (Status: {response.status_code})"
@@ -23,65 +151,172 @@ class OllamaClient:
         except Exception as e:
             return False, f"Ollama Error: {str(e)}"
 
-    def get_available_models(self):
-        """Fetch the list of available models from Ollama."""
+    def invalidate_status(self):
+        """Drop the cached status so the next check queries Ollama."""
+        self._status_cache = None
+
+    def _fetch_models(self):
+        """Fetch the list of available models from Ollama, or None on a non-200 response."""
+        response = self._session.get(f"{self.base_url}/api/tags", timeout=2)
+        if response.status_code == 200:
+            data = response.json()
+            return [model["name"] for model in data.get("models", [])]
+        return None
+
+    def _models_entry(self):
+        """
+        Return the (fetched_at, names, name set) cache entry, refetching it once
+        MODELS_CACHE_TTL has passed; None if Ollama could not be queried.
+        """
+        entry = self._models_cache
+        if entry is not None and time.monotonic() - entry[0] < MODELS_CACHE_TTL:
+            return entry
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=2)
-            if response.status_code == 200:
-                data = response.json()
-                return [model["name"] for model in data.get("models", [])]
-            return []
+            models = self._fetch_models()
         except Exception as e:
             self.logger.error(f"Failed to fetch available models: {str(e)}")
-            return []
+            return None
+        if models is None:
+            return None
+        self._models_cache = (time.monotonic(), models, frozenset(models))
+        return self._models_cache
+
+    def get_available_models(self):
+        """Return the available models, cached for MODELS_CACHE_TTL seconds after a successful fetch."""
+        entry = self._models_entry()
+        return list(entry[1]) if entry is not None else []
+
+    def _available_model_set(self):
+        """Return the available model names as a frozenset for O(1) membership tests."""
+        entry = self._models_entry()
+        return entry[2] if entry is not None else frozenset()
+
+    def invalidate_models_cache(self):
+        """Drop the cached model list so the next lookup hits Ollama."""
+        self._models_cache = None
+
+    def _post_generate(self, payload):
+        """
+        Start a streaming generate request, retrying refused or dropped connections.
+
+        Only the request itself is retried; once the caller starts consuming the
+        stream a failure propagates, since a retry would duplicate text. Gateway
+        errors (502/503/504) are retried by the session's adapter.
+        """
+        delay = GENERATE_RETRY_DELAY
+        for attempt in range(1, GENERATE_ATTEMPTS + 1):
+            try:
+                response = self._session.post(
+                    f"{self.base_url}/api/generate",
+                    json=payload,
+                    timeout=GENERATE_TIMEOUT,
+                    stream=True,
+                )
+                response.raise_for_status()
+                return response
+            except requests.ConnectionError as e:
+                if attempt == GENERATE_ATTEMPTS:
+                    raise
+                self.logger.warning(
+                    f"Ollama connection failed (attempt {attempt}/{GENERATE_ATTEMPTS}), retrying in {delay}s: {str(e)}"
+                )
+                time.sleep(delay)
+                delay *= 2
+
+    def generate_story_stream(self, emojis, model=None, word_count=150, temperature=1.2, stats=None):
+        """
+        Generate a story from a list of emojis, yielding text chunks as Ollama streams them.
 
-    def generate_story(self, emojis, model=None, word_count=150, temperature=1.2):
-        """Generate a story from a list of emojis using Ollama."""
+        If a stats dict is passed, the generation statistics from the final
+        ("done") chunk, such as eval_count and total_duration, are copied into it.
+        """
         target_model = model or self.model
 
-        # Validate that the model is available before attempting generation
-        available_models = self.get_available_models()
-        if target_model not in available_models:
+        # Only the default model is checked up front; an explicitly chosen model
+        # is trusted, and Ollama answers 404 if it turns out to be missing
+        if model is None and target_model not in self._available_model_set():
             raise ValueError(
-                f"Model '{target_model}' is not available. Available models: {available_models}"
+                f"Model '{target_model}' is not available. Available models: {self.get_available_models()}"
             )
 
-        emoji_str = " ".join(emojis)
-        prompt = (
-            f"Write a creative story with a beginning, middle, and end, inspired by these emojis: {emoji_str}. "
-            f"The story should be about {word_count} words long."
-        )
+        prompt = _PROMPT_TMPL.format(emojis=" ".join(emojis), words=word_count)
 
         try:
-            response = requests.post(
-                f"{self.base_url}/api/generate",
-                json={
-                    "model": target_model,
-                    "prompt": prompt,
-                    "options": {"temperature": temperature},
-                },
-                timeout=300,
-                stream=True,
-            )
-            response.raise_for_status()
-
-            story = ""
-            for line in response.iter_lines():
-                if line:
-                    try:
-                        data = json.loads(line)
-                        if "response" in data:
-                            story += data["response"]
-                    except Exception:
-                        continue
-            return story.strip()
+            response = self._post_generate({
+                "model": target_model,
+                "prompt": prompt,
+                "options": {"temperature": temperature},
+            })
+
+            # Lines stay bytes: both the byte scan and orjson take them undecoded.
+            # Ollama's chunked responses are still yielded as each chunk arrives.
+            for line in response.iter_lines(chunk_size=STREAM_CHUNK_SIZE, decode_unicode=False):
+                if not line:
+                    continue
+                text = _extract_response(line)
+                if text is not None:
+                    if text:
+                        yield text
+                    continue
+                try:
+                    data = _json_loads(line)
+                except Exception:
+                    continue
+                if data.get("response"):
+                    yield data["response"]
+                if data.get("done") and stats is not None:
+                    stats.update({k: v for k, v in data.items() if k in STREAM_STAT_FIELDS})
         except requests.HTTPError as e:
             if e.response.status_code == 404:
+                # The cached model list is stale if it still claimed this model existed
+                self.invalidate_models_cache()
                 raise ValueError(
-                    f"Model '{target_model}' not found or Ollama API error. Ensure the model is pulled and try again."
+                    f"Model '{target_model}' is not available. Available models: {self.get_available_models()}"
                 )
             else:
                 raise
         except Exception as e:
             self.logger.error(f"Ollama story generation failed: {str(e)}")
             raise
+
+    def generate_story(self, emojis, model=None, word_count=150, temperature=1.2, use_cache=False):
+        """
+        Generate a story from a list of emojis using Ollama.
+
+        With use_cache=True, a story generated recently for the same emojis,
+        model, word count and temperature is returned instead of a new one.
+        """
+        key = (tuple(emojis), model or self.model, word_count, round(temperature, 2))
+        if use_cache:
+            for cached_key, cached_story in self._result_cache:
+                if cached_key == key:
+                    return cached_story
+
+        story = "".join(
+            self.generate_story_stream(
+                emojis, model=model, word_count=word_count, temperature=temperature
+            )
+        ).strip()
+        self._result_cache.appendleft((key, story))
+        return story
+
+    def generate_stories(self, emojis, count, model=None, word_count=150, temperature=1.2):
+        """
+        Generate several story variants for the same emojis.
+
+        Requests are issued concurrently over the pooled session; Ollama may still
+        serialize them server-side, but connection and parsing overhead overlap.
+        Results are returned in request order.
+        """
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            futures = [
+                executor.submit(
+                    self.generate_story,
+                    emojis,
+                    model=model,
+                    word_count=word_count,
+                    temperature=temperature,
+                )
+                for _ in range(count)
+            ]
+            return [future.result() for future in futures]
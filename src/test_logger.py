@@ -28,6 +28,9 @@ def test_logging():
     except Exception as e:
         logger.error(f"This is an error message: {str(e)}")
     
+    # Write buffered error records before inspecting the file
+    logger.flush()
+
     # Verify log file exists
     log_file = 'logs/error.log'
     if os.path.exists(log_file):
@@ -0,0 +1,9 @@
+"""
+Shared pytest setup: put the project root first on sys.path so `src` imports
+resolve the same way for every test module.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
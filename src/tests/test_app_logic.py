@@ -1,9 +1,8 @@
+import json
+import os
+import tempfile
 import unittest
-import sys
-from pathlib import Path
-
-# Add project root to path
-sys.path.append(str(Path(__file__).parent.parent.parent))
+from unittest.mock import patch
 
 from src.emoji_manager import EmojiManager
 from src.data_store import DataStore
@@ -21,9 +20,60 @@ class TestAppLogic(unittest.TestCase):
     def test_data_store_init(self):
         print("\n[Test] Verifying DataStore initialization...")
         print("      - Rationale: Ensure the persistence layer is ready to handle session data.")
-        # We should use a temp path here in real scenario, but for now just check it loads
-        store = DataStore()
-        self.assertIsNotNone(store)
+        with tempfile.TemporaryDirectory() as data_dir:
+            store = DataStore(data_dir=data_dir)
+            self.assertIsNotNone(store)
+            self.assertTrue(os.path.exists(store.data_file))
+            store.close()
+            self.assertFalse(store._writer.is_alive())
+
+    def test_data_store_append_and_read(self):
+        print("\n[Test] Verifying append-only session storage round trip...")
+        print("      - Rationale: Saves append one JSON line instead of rewriting the whole history.")
+        with tempfile.TemporaryDirectory() as data_dir:
+            store = DataStore(data_dir=data_dir)
+            first = store.save_session(emojis=["😊"], notes="first")
+            second = store.save_session(emojis=["🌟", "🎉"], notes="second")
+            store.flush()
+            with open(store.data_file, 'r', encoding='utf-8') as f:
+                self.assertEqual(len(f.readlines()), 2)
+            sessions = store.get_all_sessions()
+            self.assertEqual([s["session_id"] for s in sessions], [first, second])
+            self.assertEqual(store.get_session(second)["notes"], "second")
+
+            # Compaction replaces the file; the store's open handle must follow it
+            store._compact()
+            third = store.save_session(emojis=["🦁"], notes="third")
+            self.assertEqual([s["session_id"] for s in store.get_all_sessions()], [first, second, third])
+            store.close()
+
+    def test_data_store_retries_failed_write(self):
+        print("\n[Test] Verifying a failed background write is kept and retried...")
+        print("      - Rationale: A transient lock or disk error must not silently drop a saved session.")
+        with tempfile.TemporaryDirectory() as data_dir:
+            store = DataStore(data_dir=data_dir)
+            real_append = store._append_sessions
+            with patch.object(store, '_append_sessions', side_effect=OSError("disk full")):
+                with self.assertLogs("emoji_story_builder", level="ERROR"):
+                    first = store.save_session(emojis=["😊"], notes="first")
+                    with self.assertRaises(IOError):
+                        store.flush()
+            with patch.object(store, '_append_sessions', side_effect=real_append):
+                second = store.save_session(emojis=["🌟"], notes="second")
+                store.flush()
+            self.assertEqual([s["session_id"] for s in store.get_all_sessions()], [first, second])
+            store.close()
+
+    def test_data_store_migrates_legacy_json(self):
+        print("\n[Test] Verifying migration from legacy sessions.json...")
+        print("      - Rationale: Existing session history must survive the switch to JSON Lines.")
+        with tempfile.TemporaryDirectory() as data_dir:
+            legacy = {"sessions": [{"session_id": "abc", "timestamp": "2025-01-31T10:48:04.244100Z", "emojis": ["😊"], "notes": ""}]}
+            with open(os.path.join(data_dir, "sessions.json"), 'w', encoding='utf-8') as f:
+                json.dump(legacy, f)
+            store = DataStore(data_dir=data_dir)
+            self.assertEqual(store.get_session("abc")["emojis"], ["😊"])
+            store.close()
 
     def test_app_has_main(self):
         print("\n[Test] Verifying structural integrity (main function existence)...")
@@ -32,5 +82,32 @@ class TestAppLogic(unittest.TestCase):
         self.assertTrue(hasattr(app, 'main'), "src/app.py is missing the 'main' function!")
         self.assertTrue(callable(app.main), "src/app.py 'main' is not a callable function!")
 
+    def test_split_mermaid_segments(self):
+        print("\n[Test] Verifying readme mermaid segmentation...")
+        print("      - Rationale: The Documentation tab renders cached segments, so the split must keep every part.")
+        from src.app import split_mermaid_segments
+        text = "Intro\n```mermaid\ngraph TD\nA-->B\n```\nOutro"
+        segments = split_mermaid_segments(text)
+        self.assertEqual(segments[0], ("md", "Intro\n"))
+        self.assertEqual(segments[1], ("mermaid", "\ngraph TD\nA-->B\n"))
+        self.assertEqual(segments[2], ("md", "\nOutro"))
+
+    def test_read_tail_bounded(self):
+        print("\n[Test] Verifying bounded tail read of large files...")
+        print("      - Rationale: The History tab must not load an unbounded sessions file on every rerun.")
+        from src.app import read_tail
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False, encoding='utf-8') as f:
+            f.write("".join(f"line {i}\n" for i in range(1000)))
+        try:
+            tail, truncated = read_tail(f.name, 64)
+            self.assertTrue(truncated)
+            self.assertTrue(tail.endswith("line 999\n"))
+            self.assertTrue(tail.startswith("line "))
+            full, truncated = read_tail(f.name, 1024 * 1024)
+            self.assertFalse(truncated)
+            self.assertTrue(full.startswith("line 0\n"))
+        finally:
+            os.remove(f.name)
+
 if __name__ == '__main__':
     unittest.main()
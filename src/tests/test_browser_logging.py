@@ -1,10 +1,6 @@
 import unittest
 from unittest.mock import patch, MagicMock
-import sys
-from pathlib import Path
 
-# Add project root to path
-sys.path.append(str(Path(__file__).parent.parent.parent))
 
 class TestBrowserLogging(unittest.TestCase):
     @patch('streamlit.components.v1.html')
@@ -15,8 +11,7 @@ class TestBrowserLogging(unittest.TestCase):
         
         # Initialize session state for test
         init_session_state()
-        st.session_state.browser_logs = []
-        st.session_state.last_log_index = 0
+        st.session_state.browser_logs.clear()
         
         test_tag = "TEST_TAG"
         test_data = {"key": "value"}
@@ -36,11 +31,12 @@ class TestBrowserLogging(unittest.TestCase):
         # Verify the content contains the log data
         args, kwargs = mock_html.call_args
         html_content = args[0]
-        self.assertIn("<script>console.log(", html_content)
+        self.assertIn("<script>", html_content)
+        self.assertIn("console.log(L[i])", html_content)
         self.assertIn(test_tag, html_content)
         
-        # 3. Verify index update
-        self.assertEqual(st.session_state.last_log_index, 1)
+        # 3. Verify the buffer was drained
+        self.assertEqual(len(st.session_state.browser_logs), 0)
         
         # 4. Verify second flush is empty if no new logs
         mock_html.reset_mock()
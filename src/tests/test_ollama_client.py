@@ -1,19 +1,16 @@
 import unittest
 from unittest.mock import patch, MagicMock
-import sys
 import os
-from pathlib import Path
-
-# Add project root to path
-sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.ollama_client import OllamaClient
 
 class TestOllamaClient(unittest.TestCase):
     def setUp(self):
         self.client = OllamaClient(base_url="http://test:11434")
+        self.client.invalidate_models_cache()
+        self.client.invalidate_status()
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_check_status_success(self, mock_get):
         print("\n[Test] Verifying Ollama status check (Success Case)...")
         print("      - Rationale: Ensure the app correctly identifies when Ollama is online.")
@@ -22,7 +19,7 @@ class TestOllamaClient(unittest.TestCase):
         self.assertTrue(online)
         self.assertEqual(msg, "Ollama Running")
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_check_status_offline(self, mock_get):
         print("\n[Test] Verifying Ollama status check (Offline Case)...")
         print("      - Rationale: Ensure the app handles connection errors gracefully.")
@@ -32,7 +29,22 @@ class TestOllamaClient(unittest.TestCase):
         self.assertFalse(online)
         self.assertEqual(msg, "Ollama Not Detected")
 
-    @patch('requests.get')
+        # The failure is cached, so an offline server is not polled again right away
+        self.client.check_status()
+        self.assertEqual(mock_get.call_count, 1)
+        self.client.invalidate_status()
+        self.client.check_status()
+        self.assertEqual(mock_get.call_count, 2)
+
+    def test_status_probe_not_retried(self):
+        print("\n[Test] Verifying gateway errors on status probes are reported, not retried...")
+        print("      - Rationale: A 502/503/504 from /api/tags should show its status code instead of stalling and 'Not Detected'.")
+        from src.ollama_client import OLLAMA_RETRY
+        self.assertFalse(OLLAMA_RETRY.raise_on_status)
+        self.assertFalse(OLLAMA_RETRY.is_retry("GET", 503))
+        self.assertTrue(OLLAMA_RETRY.is_retry("POST", 503))
+
+    @patch('requests.Session.get')
     def test_get_available_models(self, mock_get):
         print("\n[Test] Verifying model enumeration from Ollama API...")
         print("      - Rationale: Ensure the app can fetch and parse the list of locally installed models.")
@@ -44,7 +56,11 @@ class TestOllamaClient(unittest.TestCase):
         self.assertIn("llama3.2", models)
         self.assertIn("gpt-oss:120b", models)
 
-    @patch('requests.post')
+        # A second lookup within the TTL is served from the cache
+        self.client.get_available_models()
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('requests.Session.post')
     def test_generate_story_success(self, mock_post):
         print("\n[Test] Verifying story generation with mocked Ollama response...")
         print("      - Rationale: Ensure the app correctly formats prompts and parses streamed responses.")
@@ -52,8 +68,113 @@ class TestOllamaClient(unittest.TestCase):
         mock_response.iter_lines.return_value = [b'{"response": "Once "}', b'{"response": "upon "}', b'{"response": "a time."}']
         mock_post.return_value = mock_response
         
-        story = self.client.generate_story(["🦁"], word_count=5)
+        with patch.object(OllamaClient, '_available_model_set', return_value=frozenset({"llama3.2"})):
+            story = self.client.generate_story(["🦁"], word_count=5)
         self.assertEqual(story, "Once upon a time.")
 
+    @patch('requests.Session.post')
+    def test_generate_story_stream_chunks(self, mock_post):
+        print("\n[Test] Verifying streamed story generation yields chunks incrementally...")
+        print("      - Rationale: The UI renders each chunk as it arrives instead of waiting for the full story.")
+        mock_response = MagicMock()
+        mock_response.iter_lines.return_value = [b'{"response": "Once "}', b'', b'{"response": "upon ", "done": false}', b'{"done": true, "eval_count": 2}']
+        mock_post.return_value = mock_response
+
+        stats = {}
+        with patch.object(OllamaClient, '_available_model_set', return_value=frozenset({"llama3.2"})):
+            chunks = list(self.client.generate_story_stream(["🦁"], word_count=5, stats=stats))
+        self.assertEqual(chunks, ["Once ", "upon "])
+        self.assertEqual(stats, {"eval_count": 2})
+
+    @patch('requests.Session.post')
+    def test_generate_story_stream_compact_lines(self, mock_post):
+        print("\n[Test] Verifying the regex fast path on Ollama-shaped stream lines...")
+        print("      - Rationale: Sliced text must match a full JSON parse, including escapes and non-ASCII.")
+        mock_response = MagicMock()
+        mock_response.iter_lines.return_value = [
+            '{"model":"llama3.2","response":"Caf\u00e9 🦁 ","done":false}'.encode('utf-8'),
+            b'{"model":"llama3.2","response":"said \\"h\\u00e9\\"","done":false}',
+            b'{"model":"llama3.2","response":"","done":true,"eval_count":2}',
+        ]
+        mock_post.return_value = mock_response
+
+        stats = {}
+        with patch.object(OllamaClient, '_available_model_set', return_value=frozenset({"llama3.2"})):
+            chunks = list(self.client.generate_story_stream(["🦁"], word_count=5, stats=stats))
+        self.assertEqual(chunks, ["Café 🦁 ", 'said "hé"'])
+        self.assertEqual(stats, {"eval_count": 2})
+
+    @patch('requests.Session.post')
+    def test_generate_story_explicit_model_skips_validation(self, mock_post):
+        print("\n[Test] Verifying an explicitly chosen model is not pre-validated...")
+        print("      - Rationale: The model list is only needed when Ollama reports the model missing.")
+        import requests
+        mock_response = MagicMock()
+        mock_response.iter_lines.return_value = [b'{"response": "Hello."}']
+        mock_post.return_value = mock_response
+
+        with patch.object(OllamaClient, 'get_available_models', return_value=["llama3.2"]) as mock_models:
+            story = self.client.generate_story(["🦁"], model="mistral", word_count=5)
+            self.assertEqual(story, "Hello.")
+            mock_models.assert_not_called()
+
+            missing = MagicMock(status_code=404)
+            mock_post.return_value.raise_for_status.side_effect = requests.HTTPError(response=missing)
+            with self.assertRaises(ValueError) as ctx:
+                self.client.generate_story(["🦁"], model="mistral", word_count=5)
+            self.assertIn("llama3.2", str(ctx.exception))
+            mock_models.assert_called_once()
+
+    def test_generate_story_result_cache(self):
+        print("\n[Test] Verifying opt-in reuse of a recent story...")
+        print("      - Rationale: Identical requests with use_cache=True skip Ollama; the default stays non-deterministic.")
+        with patch.object(OllamaClient, 'generate_story_stream', side_effect=[iter(["First."]), iter(["Second."])]) as mock_stream:
+            first = self.client.generate_story(["🦁"], word_count=5)
+            cached = self.client.generate_story(["🦁"], word_count=5, use_cache=True)
+            fresh = self.client.generate_story(["🦁"], word_count=5)
+        self.assertEqual((first, cached, fresh), ("First.", "First.", "Second."))
+        self.assertEqual(mock_stream.call_count, 2)
+
+    def test_generate_stories_variants(self):
+        print("\n[Test] Verifying concurrent generation of story variants...")
+        print("      - Rationale: Each requested variant must come back from its own generation call.")
+        with patch.object(OllamaClient, 'generate_story', side_effect=["First.", "Second.", "Third."]) as mock_generate:
+            stories = self.client.generate_stories(["🦁"], 3, model="llama3.2", word_count=5)
+        self.assertEqual(mock_generate.call_count, 3)
+        self.assertEqual(sorted(stories), ["First.", "Second.", "Third."])
+
+    @patch('time.sleep')
+    @patch('requests.Session.post')
+    def test_generate_story_retries_connection_error(self, mock_post, mock_sleep):
+        print("\n[Test] Verifying bounded retry when Ollama refuses the generate connection...")
+        print("      - Rationale: A transient connection failure should not fail the story, but retries must stop.")
+        import requests
+        mock_response = MagicMock()
+        mock_response.iter_lines.return_value = [b'{"response": "Retried."}']
+        mock_post.side_effect = [requests.exceptions.ConnectionError(), mock_response]
+
+        with patch.object(OllamaClient, '_available_model_set', return_value=frozenset({"llama3.2"})):
+            story = self.client.generate_story(["🦁"], word_count=5)
+        self.assertEqual(story, "Retried.")
+        self.assertEqual(mock_post.call_count, 2)
+        mock_sleep.assert_called_once()
+
+        mock_post.reset_mock()
+        mock_post.side_effect = requests.exceptions.ConnectionError()
+        with patch.object(OllamaClient, '_available_model_set', return_value=frozenset({"llama3.2"})):
+            # Capture the expected failure record instead of writing it to logs/error.log
+            with self.assertLogs("emoji_story_builder.ollama", level="ERROR"):
+                with self.assertRaises(requests.exceptions.ConnectionError):
+                    self.client.generate_story(["🦁"], word_count=5)
+        self.assertEqual(mock_post.call_count, 3)
+
+    @patch('requests.Session.close')
+    def test_context_manager_closes_session(self, mock_close):
+        print("\n[Test] Verifying the client closes its pooled session on exit...")
+        print("      - Rationale: Keep-alive connections should be released when the client is done.")
+        with OllamaClient(base_url="http://test:11434") as client:
+            self.assertIsInstance(client, OllamaClient)
+        mock_close.assert_called_once()
+
 if __name__ == '__main__':
     unittest.main()
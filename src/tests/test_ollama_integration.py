@@ -1,9 +1,4 @@
 import unittest
-import sys
-from pathlib import Path
-
-# Add project root to path
-sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from src.ollama_client import OllamaClient
 
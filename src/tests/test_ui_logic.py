@@ -1,10 +1,6 @@
 import unittest
 from unittest.mock import patch, MagicMock
-import sys
-from pathlib import Path
 
-# Add project root to path
-sys.path.append(str(Path(__file__).parent.parent.parent))
 
 class TestUILogic(unittest.TestCase):
     def test_generated_story_state_update(self):
@@ -29,5 +25,87 @@ class TestUILogic(unittest.TestCase):
         
         print(f"      - Verified state content: '{mock_session_state['generated_story'][:20]}...'")
 
+    def test_save_current_session_skips_unchanged(self):
+        """Verify that unchanged emojis and notes are not written twice."""
+        print("\n[Test] Verifying save deduplication for unchanged sessions...")
+        print("      - Rationale: Notes on_change fires often; identical content should not hit the disk again.")
+        import streamlit as st
+        from src.app import save_current_session
+
+        st.session_state.current_emojis = ["🦁", "🌙"]
+        st.session_state.notes = "A lion under the moon"
+        st.session_state.pop('_last_save_hash', None)
+        st.session_state.last_save_ts = 0.0
+        mock_store = MagicMock()
+
+        save_current_session(mock_store)
+        save_current_session(mock_store)
+        self.assertEqual(mock_store.save_session.call_count, 1)
+
+        st.session_state.notes = "A lion under the full moon"
+        save_current_session(mock_store, force=True)
+        self.assertEqual(mock_store.save_session.call_count, 2)
+
+    def test_save_current_session_debounced(self):
+        """Verify that autosaves within the debounce window are skipped unless forced."""
+        print("\n[Test] Verifying notes autosave debounce...")
+        print("      - Rationale: Rapid edits should collapse into one disk write; explicit saves always write.")
+        import streamlit as st
+        from src.app import save_current_session
+
+        st.session_state.current_emojis = ["🐙"]
+        st.session_state.notes = "draft 1"
+        st.session_state.pop('_last_save_hash', None)
+        st.session_state.last_save_ts = 0.0
+        mock_store = MagicMock()
+
+        save_current_session(mock_store)
+        st.session_state.notes = "draft 2"
+        save_current_session(mock_store)
+        self.assertEqual(mock_store.save_session.call_count, 1)
+
+        save_current_session(mock_store, force=True)
+        self.assertEqual(mock_store.save_session.call_count, 2)
+
+    def test_debounced_save_flushed_later(self):
+        """Verify that an edit skipped by the debounce is saved on a later rerun."""
+        print("\n[Test] Verifying trailing save of a debounced edit...")
+        print("      - Rationale: The last edit inside the debounce window must not be lost when typing stops.")
+        import streamlit as st
+        from src.app import save_current_session, flush_pending_save
+
+        st.session_state.current_emojis = ["🦊"]
+        st.session_state.notes = "first"
+        st.session_state.pop('_last_save_hash', None)
+        st.session_state.last_save_ts = 0.0
+        mock_store = MagicMock()
+
+        save_current_session(mock_store, force=True)
+        st.session_state.notes = "first, then more"
+        save_current_session(mock_store)
+        flush_pending_save(mock_store)
+        self.assertEqual(mock_store.save_session.call_count, 1)
+
+        # Once the interval has passed, the next rerun writes the pending edit
+        st.session_state.last_save_ts -= 10
+        flush_pending_save(mock_store)
+        self.assertEqual(mock_store.save_session.call_count, 2)
+        self.assertEqual(mock_store.save_session.call_args.kwargs["notes"], "first, then more")
+        self.assertFalse(st.session_state._save_pending)
+
+    def test_streaming_render_throttled(self):
+        """Verify that streamed chunks are joined once and re-rendered at a bounded rate."""
+        print("\n[Test] Verifying throttled rendering of a streamed story...")
+        print("      - Rationale: Re-sending the whole story for every chunk is quadratic; the final text must still be shown.")
+        from src.app import _accumulate_streaming_response
+
+        placeholder = MagicMock()
+        chunks = ["word "] * 200 + ["end. "]
+        story = _accumulate_streaming_response(iter(chunks), placeholder)
+
+        self.assertEqual(story, "".join(chunks).strip())
+        self.assertLess(placeholder.markdown.call_count, len(chunks))
+        placeholder.markdown.assert_called_with("".join(chunks))
+
 if __name__ == '__main__':
     unittest.main()